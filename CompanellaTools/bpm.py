@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 import argparse
+import glob
 import json
+import multiprocessing
+import os
 import sys
-from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import librosa
+import numba
 import numpy as np
 import scipy.ndimage
+import soundfile as sf
+
+AUDIO_EXTENSIONS = (".mp3", ".ogg", ".wav", ".flac")
 
 
 def parse_arguments():
@@ -22,15 +29,21 @@ def parse_arguments():
             "No beat snapping, no BPM-from-diffs spam."
         )
     )
-    p.add_argument("audio_file", type=str, help="Path to audio file")
+    p.add_argument(
+        "audio_file",
+        type=str,
+        help="Path to audio file, or a directory / glob pattern to analyze many files (batch mode)",
+    )
 
-    p.add_argument("-o", "--output", type=str, default=None, help="Write output to file")
+    p.add_argument(
+        "-o", "--output", type=str, default=None, help="Write output to file (batch mode: output directory)"
+    )
     p.add_argument("-j", "--json", action="store_true", help="Output JSON")
     p.add_argument("-a", "--average", action="store_true", help="Show average BPM across timing points")
 
     p.add_argument("--bpm-hint", type=float, default=None, help="Expected BPM hint (e.g. 180)")
     p.add_argument("--percussion", action="store_true", help="Use HPSS percussive component")
-    p.add_argument("--tightness", type=float, default=80, help="librosa beat_track tightness (default 80)")
+    p.add_argument("--tightness", type=float, default=80, help="Ignored; kept for compatibility with older callers")
 
     # Onset/grid matching
     p.add_argument("--hop-length", type=int, default=256, help="Hop length for onset envelope (default 256)")
@@ -76,12 +89,31 @@ def parse_arguments():
     p.add_argument("--min-gap-ms", type=float, default=600.0, help="Min time between timing points (ms) (default 600)")
     p.add_argument("--max-points", type=int, default=200, help="Hard cap timing points (default 200)")
 
+    # Batch mode
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for batch mode (default: CPU count)",
+    )
+
     return p.parse_args()
 
 
-def load_audio(path: str):
+def load_audio(path: str, target_sr=44100):
     try:
-        y, sr = librosa.load(path, sr=44100, mono=True)
+        try:
+            # libsndfile decodes WAV/FLAC/OGG (and MP3 on recent builds) without librosa's wrapper.
+            y, sr = sf.read(path, dtype="float32", always_2d=False)
+        except Exception:
+            # Anything libsndfile can't open goes through librosa's audioread fallback.
+            y, sr = librosa.load(path, sr=target_sr, mono=True)
+        else:
+            if y.ndim == 2:
+                y = y.mean(axis=1)
+            if sr != target_sr:
+                y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+                sr = target_sr
         if y.size == 0:
             raise ValueError("Empty audio.")
         return y, sr
@@ -90,22 +122,76 @@ def load_audio(path: str):
         sys.exit(1)
 
 
-def compute_onset_env(y, sr, hop_length):
-    onset_spectral = librosa.onset.onset_strength(
-        y=y,
-        sr=sr,
-        hop_length=hop_length,
-        aggregate=np.median,
-        fmax=8000,
-        n_mels=128,
+def median_filter3(x):
+    """
+    3-tap running median (same result as scipy.ndimage.median_filter(x, size=3)).
+    Edge samples are kept as-is, matching the filter's default reflect mode.
+    """
+    out = x.copy()
+    if x.size < 3:
+        return out
+    a, b, c = x[:-2], x[1:-1], x[2:]
+    out[1:-1] = np.maximum(np.minimum(a, b), np.minimum(np.maximum(a, b), c))
+    return out
+
+
+def superflux(S, lag=1, max_size=3, n_fft=2048, hop_length=256, center=True):
+    """
+    SuperFlux onset strength of a (log-scaled) spectrogram S (bins x frames):
+    rectified difference between each frame and the frequency-max-filtered frame
+    `lag` steps earlier, averaged over bins. The max filter suppresses vibrato /
+    slowly gliding partials, so harmonic content adds less spurious flux.
+    Padded with the same alignment as librosa: frame k of the result sits at k * hop_length.
+    For an uncentered STFT the frames start n_fft / 2 earlier, so the shift is a full n_fft.
+    """
+    ref = scipy.ndimage.maximum_filter1d(S, size=max_size, axis=0) if max_size > 1 else S
+    flux = np.maximum(S[:, lag:] - ref[:, :-lag], 0.0).mean(axis=0)
+    pad_width = lag + (n_fft // (2 * hop_length) if center else n_fft // hop_length)
+    flux = np.pad(flux, (pad_width, 0))
+    return flux[: S.shape[1]] if center else flux
+
+
+def compute_onset_env(y, sr, hop_length, use_percussion=False):
+    n_fft = 2048
+    # One STFT feeds both bands: SuperFlux on log-mel (spectral) and on log-magnitude (energy).
+    # The whole envelope pipeline runs in float32; float64 buys nothing for onset detection.
+    # No centering pad: superflux() shifts the envelope to compensate for the framing offset.
+    # Clips shorter than one frame are zero-padded to it (uncentered analysis needs a full frame).
+    y = y.astype(np.float32, copy=False)
+    if len(y) < n_fft:
+        y = np.pad(y, (0, n_fft - len(y)))
+    S = np.abs(
+        librosa.stft(
+            y,
+            n_fft=n_fft,
+            hop_length=hop_length,
+            center=False,
+            dtype=np.complex64,
+        )
     )
-    S = np.abs(librosa.stft(y, n_fft=2048, hop_length=hop_length))
-    onset_energy = librosa.onset.onset_strength(S=S, sr=sr, hop_length=hop_length, aggregate=np.mean)
+
+    if use_percussion:
+        # Percussive part straight from this magnitude spectrogram instead of librosa.effects.hpss,
+        # which runs its own STFT, an ISTFT and keeps both full-length signals around.
+        # Masks come from every other frame so the median filters see the same time span and cost
+        # as effects.hpss (hop 512); they are then applied in place at full resolution.
+        try:
+            step = max(1, 512 // hop_length)
+            _, mask_p = librosa.decompose.hpss(S[:, ::step], mask=True)
+            for offset in range(step):
+                S[:, offset::step] *= mask_p[:, : S[:, offset::step].shape[1]]
+        except Exception:
+            pass
+
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=128, fmax=8000)
+    mel_db = librosa.power_to_db(mel_basis @ (S**2))
+    onset_spectral = superflux(mel_db, n_fft=n_fft, hop_length=hop_length, center=False)
+    onset_energy = superflux(np.log1p(1000.0 * S), n_fft=n_fft, hop_length=hop_length, center=False)
 
     onset_spectral = onset_spectral / (np.max(onset_spectral) + 1e-12)
     onset_energy = onset_energy / (np.max(onset_energy) + 1e-12)
     env = 0.75 * onset_spectral + 0.25 * onset_energy
-    env = scipy.ndimage.median_filter(env, size=3)
+    env = median_filter3(env.astype(np.float32, copy=False))
     return env
 
 
@@ -123,65 +209,264 @@ def estimate_initial_bpm(onset_env, sr, hop_length, bpm_hint):
     return float(librosa.feature.tempo(onset_envelope=onset_env, sr=sr, hop_length=hop_length)[0])
 
 
-def estimate_initial_anchor(onset_env, sr, hop_length, bpm, tightness):
-    # Use beat_track ONLY to seed a starting time anchor (t0).
-    _, beat_frames = librosa.beat.beat_track(
-        onset_envelope=onset_env,
-        sr=sr,
-        hop_length=hop_length,
-        bpm=bpm,
-        tightness=tightness,
-        trim=False,
-    )
-    if beat_frames is None or len(beat_frames) < 2:
+def estimate_initial_anchor(onset_env, onset_frames, onset_times, search_seconds=5.0):
+    # Seed the starting time anchor (t0) from the first strong onset (top 20% by envelope strength)
+    # within the first few seconds after the first onset, so quiet intros still count.
+    # Cheaper than a full beat_track DP pass; snapping and phase selection refine it afterwards.
+    if onset_times.size == 0:
         return 0.0
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
-    return float(beat_times[0])
+    head = onset_times <= onset_times[0] + search_seconds
+    strength = onset_env[onset_frames[head]]
+    strong = onset_times[head][strength >= np.quantile(strength, 0.8)]
+    return float(strong[0]) if strong.size else 0.0
 
 
-def find_nearest_onset(onset_times, idx_hint, t, window_s):
+def match_beats(onset_times, t_beats, window_s):
     """
+    Match every beat time to its nearest onset in one vectorized pass.
     onset_times must be sorted.
-    idx_hint is the previous onset index (monotonic scan).
-    Returns (matched_time or None, new_idx_hint)
+    Returns matched onset times (NaN where no onset lies within window_s).
     """
+    t_beats = np.asarray(t_beats, dtype=float)
     n = len(onset_times)
     if n == 0:
-        return None, idx_hint
+        return np.full(t_beats.shape, np.nan)
+
+    idx = np.searchsorted(onset_times, t_beats)
+    left = onset_times[np.clip(idx - 1, 0, n - 1)]
+    right = onset_times[np.clip(idx, 0, n - 1)]
+
+    matched = np.where(np.abs(left - t_beats) <= np.abs(right - t_beats), left, right)
+    return np.where(np.abs(matched - t_beats) <= window_s, matched, np.nan)
+
+
+@numba.njit(cache=True, fastmath=True)
+def _match_grid(onset_times, t0, interval, window_s, duration, start_k, max_beats):
+    """
+    Two-pointer scan of the beat grid t0 + k * interval (k >= start_k, t <= duration)
+    against sorted onset_times.
+    Returns packed (beat_indices, matched_times, errors) for the matched beats only.
+    """
+    n = onset_times.shape[0]
+    beat_indices = np.empty(max_beats, dtype=np.int64)
+    matched_times = np.empty(max_beats, dtype=np.float64)
+    errors = np.empty(max_beats, dtype=np.float64)
+    count = 0
+    if n == 0:
+        return beat_indices[:0], matched_times[:0], errors[:0]
 
-    i = max(0, idx_hint)
-    while i + 1 < n and onset_times[i] < t - window_s:
-        i += 1
+    i = 0
+    for k in range(start_k, start_k + max_beats):
+        t = t0 + k * interval
+        if t > duration:
+            break
 
-    candidates = []
-    for j in (i - 1, i, i + 1, i + 2):
-        if 0 <= j < n:
+        # Cursor = last onset at or before t; the nearest onset is it or its successor.
+        while i + 1 < n and onset_times[i + 1] <= t:
+            i += 1
+
+        best_dt = window_s
+        best_j = -1
+        for j in range(i, min(i + 2, n)):
             dt = abs(onset_times[j] - t)
-            if dt <= window_s:
-                candidates.append((dt, j))
+            if dt <= best_dt and (best_j < 0 or dt < best_dt):
+                best_dt = dt
+                best_j = j
 
-    if not candidates:
-        return None, i
+        if best_j >= 0:
+            beat_indices[count] = k
+            matched_times[count] = onset_times[best_j]
+            errors[count] = onset_times[best_j] - t
+            count += 1
 
-    _, best_j = min(candidates, key=lambda x: x[0])
-    return float(onset_times[best_j]), best_j
+    return beat_indices[:count], matched_times[:count], errors[:count]
 
 
-def robust_slope_s_per_beat(beat_indices, errors_s):
+@numba.njit(cache=True)
+def robust_slope_s_per_beat(n, s_x, s_y, s_xx, s_xy, med_x, med_y):
     """
-    Slope estimate of error vs beat index.
+    Slope estimate of error vs beat index, centered on the medians.
+    Works from running sums (x = beat index, y = error) so the window is never re-scanned.
     Returns slope in seconds/beat.
     """
-    x = np.asarray(beat_indices, dtype=float)
-    y = np.asarray(errors_s, dtype=float)
-    if x.size < 6:
+    if n < 6:
         return 0.0
-    x0 = x - np.median(x)
-    y0 = y - np.median(y)
-    denom = np.dot(x0, x0)
+    denom = s_xx - 2.0 * med_x * s_x + n * med_x * med_x
     if denom <= 1e-12:
         return 0.0
-    return float(np.dot(x0, y0) / denom)
+    return (s_xy - med_x * s_y - med_y * s_x + n * med_x * med_y) / denom
+
+
+@numba.njit(cache=True)
+def _decision_loop(
+    onset_times,
+    t0,
+    interval,
+    bpm,
+    duration,
+    window_s,
+    start_k,
+    win_size,
+    min_matches,
+    persist,
+    drift_ms,
+    offset_ms,
+    bpm_min_change,
+    min_gap_ms,
+    max_points,
+):
+    """
+    Mode A state machine over the beat grid, compiled.
+    Keeps the last win_size matched errors in a ring buffer with running sums and inserts a
+    timing point when drift (BPM change) or an offset jump persists; each new point re-anchors
+    the grid and the rest of the track is re-matched from the next beat.
+    Returns (times, bpms) of all timing points starting with (t0, bpm), and the final bpm.
+    """
+    # Grown on demand: max_points is a user cap, not an allocation size.
+    times = np.empty(min(max(1, max_points), 64), dtype=np.float64)
+    bpms = np.empty(times.shape[0], dtype=np.float64)
+    times[0] = t0
+    bpms[0] = bpm
+    n_points = 1
+    last_point_time = t0
+
+    err_buf = np.empty(win_size, dtype=np.float64)
+    idx_buf = np.empty(win_size, dtype=np.float64)
+    sorted_buf = np.empty(win_size, dtype=np.float64)
+    win_n = 0
+    win_pos = 0
+    s_x = 0.0
+    s_y = 0.0
+    s_xx = 0.0
+    s_xy = 0.0
+
+    eval_streak_offset = 0
+    eval_streak_drift = 0
+    jump_max_slope_ms = drift_ms * 0.6
+
+    beat_idx = start_k
+    while n_points < max_points:
+        n_beats = int((duration - t0) / interval) + 1
+        seg_beats, seg_times, seg_errors = _match_grid(
+            onset_times, t0, interval, window_s, duration, beat_idx, max(1, n_beats - beat_idx + 1)
+        )
+        seg_pos = 0
+        regrid = False
+
+        for k in range(beat_idx, n_beats + 1):
+            beat_idx = k
+            t = t0 + k * interval
+            if t > duration:
+                break
+
+            has_match = False
+            matched = 0.0
+            if seg_pos < seg_beats.shape[0] and seg_beats[seg_pos] == k:
+                has_match = True
+                matched = seg_times[seg_pos]
+                e = seg_errors[seg_pos]
+                seg_pos += 1
+
+                x = float(k)
+                if win_n == win_size:
+                    x_old = idx_buf[win_pos]
+                    e_old = err_buf[win_pos]
+                    s_x -= x_old
+                    s_y -= e_old
+                    s_xx -= x_old * x_old
+                    s_xy -= x_old * e_old
+                else:
+                    win_n += 1
+                idx_buf[win_pos] = x
+                err_buf[win_pos] = e
+                s_x += x
+                s_y += e
+                s_xx += x * x
+                s_xy += x * e
+                win_pos = (win_pos + 1) % win_size
+
+                if win_pos == 0:
+                    # Resync once per revolution so add/subtract rounding cannot drift.
+                    s_x = 0.0
+                    s_y = 0.0
+                    s_xx = 0.0
+                    s_xy = 0.0
+                    for j in range(win_n):
+                        s_x += idx_buf[j]
+                        s_y += err_buf[j]
+                        s_xx += idx_buf[j] * idx_buf[j]
+                        s_xy += idx_buf[j] * err_buf[j]
+
+            if win_n >= min_matches:
+                # Beat indices are increasing in insertion order, so their median is the middle entry.
+                oldest = (win_pos - win_n) % win_size
+                mid = (oldest + win_n // 2) % win_size
+                if win_n % 2:
+                    med_x = idx_buf[mid]
+                else:
+                    med_x = 0.5 * (idx_buf[mid] + idx_buf[(mid - 1) % win_size])
+
+                window = sorted_buf[:win_n]
+                window[:] = err_buf[:win_n]
+                window.sort()
+                half = win_n // 2
+                med_e = window[half] if win_n % 2 else 0.5 * (window[half] + window[half - 1])
+
+                slope = robust_slope_s_per_beat(win_n, s_x, s_y, s_xx, s_xy, med_x, med_e)  # s/beat
+
+                med_e_ms = med_e * 1000.0
+                slope_ms = slope * 1000.0
+
+                is_drift = abs(slope_ms) >= drift_ms
+                is_jump = abs(med_e_ms) >= offset_ms and abs(slope_ms) < jump_max_slope_ms
+
+                eval_streak_drift = eval_streak_drift + 1 if is_drift else 0
+                eval_streak_offset = eval_streak_offset + 1 if is_jump else 0
+
+                new_point = False
+                anchor_time = matched if has_match else t + med_e
+
+                if eval_streak_drift >= persist:
+                    new_interval = interval + slope
+                    new_bpm = 60.0 / new_interval if new_interval > 1e-4 else bpm
+
+                    if np.isfinite(new_bpm) and abs(new_bpm - bpm) >= bpm_min_change:
+                        if (anchor_time - last_point_time) * 1000.0 >= min_gap_ms:
+                            bpm = new_bpm
+                            interval = 60.0 / bpm
+                            new_point = True
+
+                elif eval_streak_offset >= persist:
+                    if (anchor_time - last_point_time) * 1000.0 >= min_gap_ms:
+                        new_point = True
+
+                if new_point:
+                    t0 = anchor_time - k * interval
+                    if n_points == times.shape[0]:
+                        grown = min(2 * n_points, max_points)
+                        times = np.concatenate((times, np.empty(grown - n_points, dtype=np.float64)))
+                        bpms = np.concatenate((bpms, np.empty(grown - n_points, dtype=np.float64)))
+                    times[n_points] = anchor_time
+                    bpms[n_points] = bpm
+                    n_points += 1
+                    last_point_time = anchor_time
+
+                    win_n = 0
+                    win_pos = 0
+                    s_x = 0.0
+                    s_y = 0.0
+                    s_xx = 0.0
+                    s_xy = 0.0
+                    eval_streak_drift = 0
+                    eval_streak_offset = 0
+                    regrid = True
+                    break
+
+        if not regrid:
+            break
+        beat_idx += 1
+
+    return times[:n_points], bpms[:n_points], bpm
 
 
 def choose_best_phase(t0, interval, onset_times, match_window_s, search_seconds, phase_divisions):
@@ -202,38 +487,25 @@ def choose_best_phase(t0, interval, onset_times, match_window_s, search_seconds,
     if ot.size == 0:
         return t0
 
-    best_t0 = t0
-    best_matches = -1
-    best_med_abs_err = float("inf")
-
-    for k in range(phase_divisions):
-        cand_t0 = t0 + (k / phase_divisions) * interval
-        onset_idx_hint = 0
-        beat_idx = 0
-        t = cand_t0
-
-        errs = []
-        matches = 0
+    # One (phase_divisions, n_beats) grid, matched in a single pass.
+    n_beats = int(search_seconds / interval) + 2
+    cand_t0s = t0 + (np.arange(phase_divisions) / phase_divisions) * interval
+    t_beats = cand_t0s[:, None] + np.arange(n_beats)[None, :] * interval
+    in_range = t_beats <= (cand_t0s + search_seconds)[:, None]
 
-        while t <= cand_t0 + search_seconds:
-            m, onset_idx_hint = find_nearest_onset(ot, onset_idx_hint, t, match_window_s)
-            if m is not None:
-                matches += 1
-                errs.append(m - t)
-            beat_idx += 1
-            t = cand_t0 + beat_idx * interval
-
-        if matches == 0:
-            continue
-
-        med_abs_err = float(np.median(np.abs(errs))) if errs else float("inf")
+    matched = match_beats(ot, t_beats, match_window_s)
+    abs_errs = np.where(in_range, np.abs(matched - t_beats), np.nan)
+    matches = np.count_nonzero(~np.isnan(abs_errs), axis=1)
+    if not matches.any():
+        return t0
 
-        if (matches > best_matches) or (matches == best_matches and med_abs_err < best_med_abs_err):
-            best_matches = matches
-            best_med_abs_err = med_abs_err
-            best_t0 = cand_t0
+    med_abs_errs = np.full(phase_divisions, np.inf)
+    has_matches = matches > 0
+    med_abs_errs[has_matches] = np.nanmedian(abs_errs[has_matches], axis=1)
 
-    return best_t0
+    # Most matches first, then smallest median error; lexsort is stable so ties keep the lowest k.
+    best_k = int(np.lexsort((med_abs_errs, -matches))[0])
+    return float(cand_t0s[best_k])
 
 
 def analyze_mode_a(
@@ -241,7 +513,6 @@ def analyze_mode_a(
     sr,
     bpm_hint=None,
     use_percussion=False,
-    tightness=80,
     hop_length=256,
     match_window_ms=40.0,
     decision_window=24,
@@ -255,16 +526,7 @@ def analyze_mode_a(
     min_gap_ms=600.0,
     max_points=200,
 ):
-    if use_percussion:
-        try:
-            y_h, y_p = librosa.effects.hpss(y)
-            y_use = y_p
-        except Exception:
-            y_use = y
-    else:
-        y_use = y
-
-    onset_env = compute_onset_env(y_use, sr, hop_length)
+    onset_env = compute_onset_env(y, sr, hop_length, use_percussion=use_percussion)
 
     onset_frames = librosa.onset.onset_detect(
         onset_envelope=onset_env,
@@ -282,13 +544,18 @@ def analyze_mode_a(
         bpm = 120.0
 
     interval = 60.0 / bpm
-    t0 = estimate_initial_anchor(onset_env, sr, hop_length, bpm, tightness)
+    t0 = estimate_initial_anchor(onset_env, onset_frames, onset_times)
+    # The decision loop only walks beats from t0 on: step back to the grid beat nearest the first onset.
+    if onset_times.size > 0:
+        t0 -= max(0.0, np.floor((t0 - onset_times[0]) / interval + 0.5)) * interval
 
     window_s = match_window_ms / 1000.0
 
     # Snap anchor once if close (safe init)
     if onset_times.size > 0:
-        j0 = int(np.argmin(np.abs(onset_times - t0)))
+        # onset_times is sorted: the nearest onset is one of the two around t0.
+        k = int(np.searchsorted(onset_times, t0))
+        j0 = k if k == 0 or (k < onset_times.size and onset_times[k] - t0 < t0 - onset_times[k - 1]) else k - 1
         if abs(onset_times[j0] - t0) <= window_s * 2.5:
             t0 = float(onset_times[j0])
 
@@ -304,95 +571,32 @@ def analyze_mode_a(
 
     duration = len(y) / sr
 
-    # Timing points list of (time, bpm)
-    points = [(t0, float(bpm))]
-    last_point_time = t0
-
-    # Rolling matched errors
-    err_q = deque(maxlen=max(8, int(decision_window)))
-    idx_q = deque(maxlen=max(8, int(decision_window)))
-
-    onset_idx_hint = 0
-    eval_streak_offset = 0
-    eval_streak_drift = 0
-
-    beat_idx = 0
-    t = t0
-
-    while t < 0:
-        beat_idx += 1
-        t = t0 + beat_idx * interval
-
-    while t <= duration and len(points) < max_points:
-        matched, onset_idx_hint = find_nearest_onset(onset_times, onset_idx_hint, t, window_s)
-
-        if matched is not None:
-            e = matched - t
-            err_q.append(float(e))
-            idx_q.append(int(beat_idx))
-
-        if len(err_q) >= min_matches:
-            errors = np.asarray(err_q, dtype=float)
-            indices = np.asarray(idx_q, dtype=int)
-
-            med_e = float(np.median(errors))
-            slope = robust_slope_s_per_beat(indices, errors)  # s/beat
-
-            med_e_ms = med_e * 1000.0
-            slope_ms = slope * 1000.0
-
-            is_drift = abs(slope_ms) >= float(drift_slope_ms_per_beat)
-            is_jump = (abs(med_e_ms) >= float(offset_threshold_ms)) and (
-                abs(slope_ms) < float(drift_slope_ms_per_beat) * 0.6
-            )
-
-            eval_streak_drift = eval_streak_drift + 1 if is_drift else 0
-            eval_streak_offset = eval_streak_offset + 1 if is_jump else 0
-
-            if eval_streak_drift >= persist:
-                new_interval = interval + slope
-                new_bpm = 60.0 / new_interval if new_interval > 1e-4 else bpm
-
-                if np.isfinite(new_bpm) and abs(new_bpm - bpm) >= bpm_min_change:
-                    anchor_time = matched if matched is not None else (t + med_e)
-                    if (anchor_time - last_point_time) * 1000.0 >= min_gap_ms:
-                        bpm = float(new_bpm)
-                        interval = 60.0 / bpm
-                        t0 = float(anchor_time) - beat_idx * interval
-
-                        points.append((float(anchor_time), float(bpm)))
-                        last_point_time = float(anchor_time)
-
-                        err_q.clear()
-                        idx_q.clear()
-                        eval_streak_drift = 0
-                        eval_streak_offset = 0
-
-            elif eval_streak_offset >= persist:
-                anchor_time = matched if matched is not None else (t + med_e)
-                if (anchor_time - last_point_time) * 1000.0 >= min_gap_ms:
-                    t0 = float(anchor_time) - beat_idx * interval
-
-                    points.append((float(anchor_time), float(bpm)))
-                    last_point_time = float(anchor_time)
-
-                    err_q.clear()
-                    idx_q.clear()
-                    eval_streak_drift = 0
-                    eval_streak_offset = 0
-
-        beat_idx += 1
-        t = t0 + beat_idx * interval
+    times, bpms, bpm = _decision_loop(
+        onset_times,
+        float(t0),
+        float(interval),
+        float(bpm),
+        float(duration),
+        float(window_s),
+        max(0, int(np.ceil(-t0 / interval))),
+        max(8, int(decision_window)),
+        max(1, int(min_matches)),
+        int(persist),
+        float(drift_slope_ms_per_beat),
+        float(offset_threshold_ms),
+        float(bpm_min_change),
+        float(min_gap_ms),
+        int(max_points),
+    )
 
-    return points, bpm
+    # Timing points list of (time, bpm)
+    points = [(float(t), float(b)) for t, b in zip(times, bpms)]
+    return points, float(bpm)
 
 
 def format_text(points, show_average, tempo_seed):
-    lines = []
-    lines.append("Time (s)     |  BPM")
-    lines.append("-" * 26)
-    for t, bpm in points:
-        lines.append(f"{t:.3f}s     |  {bpm:.2f}")
+    lines = ["Time (s)     |  BPM", "-" * 26]
+    lines += [f"{t:.3f}s     |  {bpm:.2f}" for t, bpm in points]
     if show_average and points:
         avg = float(np.mean([b for _, b in points]))
         lines.append("-" * 26)
@@ -401,26 +605,45 @@ def format_text(points, show_average, tempo_seed):
     return "\n".join(lines)
 
 
-def format_json(points, show_average, tempo_seed):
+def build_json(points, show_average, tempo_seed):
     out = {
         "beats": [{"time": round(float(t), 4), "bpm": round(float(bpm), 2)} for t, bpm in points]
     }
     if show_average and points:
         out["average_bpm"] = round(float(np.mean([b for _, b in points])), 2)
         out["tempo_seed"] = round(float(tempo_seed), 2)
-    return json.dumps(out, indent=2)
+    return out
 
 
-def main():
-    args = parse_arguments()
-    y, sr = load_audio(args.audio_file)
+def dump_json(obj):
+    return json.dumps(obj, indent=2)
+
+
+def format_json(points, show_average, tempo_seed):
+    return dump_json(build_json(points, show_average, tempo_seed))
+
+
+def format_output(points, tempo_seed, args):
+    if args.json:
+        return format_json(points, args.average, tempo_seed)
+    return format_text(points, args.average, tempo_seed)
+
+
+def write_output(path, txt):
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(txt)
+    except Exception as e:
+        print(f"Error writing output: {e}", file=sys.stderr)
+        sys.exit(1)
+
 
-    points, tempo_seed = analyze_mode_a(
+def run_analysis(y, sr, args):
+    return analyze_mode_a(
         y=y,
         sr=sr,
         bpm_hint=args.bpm_hint,
         use_percussion=args.percussion,
-        tightness=args.tightness,
         hop_length=args.hop_length,
         match_window_ms=args.match_window_ms,
         decision_window=args.decision_window,
@@ -435,21 +658,118 @@ def main():
         max_points=args.max_points,
     )
 
-    if args.json:
-        txt = format_json(points, args.average, tempo_seed)
-    else:
-        txt = format_text(points, args.average, tempo_seed)
+
+def is_batch_input(audio_file):
+    if os.path.isfile(audio_file):
+        return False
+    return os.path.isdir(audio_file) or any(ch in audio_file for ch in "*?[")
+
+
+def expand_audio_paths(audio_file):
+    """
+    Batch input -> sorted audio file list (audio files anywhere below a directory, or glob
+    matches; ** spans subdirectories). An osu! Songs folder keeps each beatmap in its own subfolder.
+    """
+    if os.path.isdir(audio_file):
+        return sorted(
+            os.path.join(dirpath, name)
+            for dirpath, _, names in os.walk(audio_file)
+            for name in names
+            if name.lower().endswith(AUDIO_EXTENSIONS)
+        )
+    return sorted(p for p in glob.glob(audio_file, recursive=True) if os.path.isfile(p))
+
+
+def analyze_file(path, args):
+    """
+    Batch worker: load and analyze one file.
+    Returns (points, tempo_seed), or None if the file failed (reported on stderr).
+    """
+    try:
+        y, sr = load_audio(path)
+        return run_analysis(y, sr, args)
+    except SystemExit:
+        print(f"Skipping {path}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"Error analyzing {path}: {e}", file=sys.stderr)
+        return None
+
+
+def batch_output_names(paths, args):
+    """
+    One output file name per input: its path below the common parent directory, flattened,
+    extension kept (song.mp3 -> song.mp3.json). Exits if two inputs would share a name.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    ext = ".json" if args.json else ".txt"
+    names, seen = {}, {}
+    for path in paths:
+        name = os.path.relpath(os.path.abspath(path), root).replace(os.sep, "_") + ext
+        # Case-insensitive: output directories on Windows are.
+        other = seen.setdefault(name.lower(), path)
+        if other != path:
+            print(f"Output name collision: {other} and {path} both map to {name}", file=sys.stderr)
+            sys.exit(1)
+        names[path] = name
+    return names
+
+
+def run_batch(paths, args):
+    names = batch_output_names(paths, args) if args.output else None
+
+    # Files are independent, so fan out over processes. One BLAS/OpenMP thread per
+    # worker keeps the pool from oversubscribing cores. Workers are always spawned, so
+    # they import numpy/scipy after this is set (forked ones would keep the parent's pools).
+    os.environ["OMP_NUM_THREADS"] = "1"
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(paths)))
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(analyze_file, paths, [args] * len(paths)))
+
+    done = [(path, res) for path, res in zip(paths, results) if res is not None]
+    failed = len(paths) - len(done)
 
     if args.output:
-        try:
-            with open(args.output, "w", encoding="utf-8") as f:
-                f.write(txt)
-        except Exception as e:
-            print(f"Error writing output: {e}", file=sys.stderr)
+        os.makedirs(args.output, exist_ok=True)
+        for path, (points, tempo_seed) in done:
+            # Like analysis errors: report this file and keep writing the rest.
+            try:
+                with open(os.path.join(args.output, names[path]), "w", encoding="utf-8") as f:
+                    f.write(format_output(points, tempo_seed, args))
+            except OSError as e:
+                print(f"Error writing output for {path}: {e}", file=sys.stderr)
+                failed += 1
+    elif args.json:
+        print(dump_json({path: build_json(points, args.average, tempo_seed) for path, (points, tempo_seed) in done}))
+    else:
+        print("\n\n".join(f"==> {path} <==\n{format_output(points, tempo_seed, args)}" for path, (points, tempo_seed) in done))
+
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    args = parse_arguments()
+
+    if is_batch_input(args.audio_file):
+        paths = expand_audio_paths(args.audio_file)
+        if not paths:
+            print(f"No audio files found for: {args.audio_file}", file=sys.stderr)
             sys.exit(1)
+        run_batch(paths, args)
+        return
+
+    y, sr = load_audio(args.audio_file)
+    points, tempo_seed = run_analysis(y, sr, args)
+    txt = format_output(points, tempo_seed, args)
+
+    if args.output:
+        write_output(args.output, txt)
     else:
         print(txt)
 
 
 if __name__ == "__main__":
+    # Required for the process pool in the frozen (PyInstaller) build on Windows.
+    multiprocessing.freeze_support()
     main()